@@ -1,91 +1,398 @@
 # app.py — Daily Scheduler (POC) + Calendar View (placeholder detail)
 # -------------------------------------------------------------------
-# Runs in memory with JSON import/export.
-# Requirements: streamlit, pandas
+# Runs in memory with JSON import/export (plus a Parquet snapshot download).
+# Requirements: streamlit>=1.37, pandas, pyarrow (orjson optional, faster JSON)
 # Optional branding: add .streamlit/config.toml (theme) in your repo.
 
 from __future__ import annotations
-import json
+import io
 from calendar import monthrange
 from datetime import date, datetime, timedelta
-from typing import Dict, Any
+from dataclasses import dataclass, fields
+from typing import Dict, Any, List, Optional, Tuple
 
 import pandas as pd
 import streamlit as st
 
+try:  # C-implemented JSON; stdlib json is imported only as the fallback
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
 # -----------------------------------
 # Page setup
 # -----------------------------------
 st.set_page_config(page_title="Northpower • Daily Scheduler (POC)", layout="wide")
 
 # (Optional) small CSS polish for brand orange #F05A28
-st.markdown(
-    """
-    <style>
-    .stMarkdown h1 { color:#F05A28 !important; font-weight:700 !important; }
-    div.stButton > button:first-child {
-        background-color:#F05A28; color:#fff; border-radius:6px; font-weight:700;
-    }
-    div.stButton > button:first-child:hover { background-color:#d94e21; color:#fff; }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+BRAND_CSS = """
+<style>
+.stMarkdown h1 { color:#F05A28 !important; font-weight:700 !important; }
+div.stButton > button:first-child {
+    background-color:#F05A28; color:#fff; border-radius:6px; font-weight:700;
+}
+div.stButton > button:first-child:hover { background-color:#d94e21; color:#fff; }
+</style>
+"""
+# Emitted every run on purpose: Streamlit drops elements a rerun doesn't re-emit.
+st.markdown(BRAND_CSS, unsafe_allow_html=True)
 
 # -----------------------------------
 # Session state bootstrapping
 # -----------------------------------
 if "schedules" not in st.session_state:
-    st.session_state.schedules: Dict[str, Dict[str, Any]] = {}
+    st.session_state.schedules: Dict[str, Schedule] = {}
 if "prefill_resources" not in st.session_state:
     st.session_state.prefill_resources = None
+if "schedules_version" not in st.session_state:
+    st.session_state.schedules_version = 0  # bumped on every schedules mutation
+if "by_month" not in st.session_state:
+    # year*12+month -> ISO date -> [schedule_id, ...]; maintained alongside `schedules`
+    st.session_state.by_month: Dict[int, Dict[str, List[str]]] = {}
+if "day_table_cache" not in st.session_state:
+    st.session_state.day_table_cache = {"version": -1, "tables": {}}
+if "export_cache" not in st.session_state:
+    st.session_state.export_cache = {"version": -1, "files": {}}
 
 # -----------------------------------
 # Dropdown Options
 # -----------------------------------
-BUSINESS_UNITS = ["DTS", "DDS", "DAR", "DWW", "DCN", "DES", "DRM"]
+BUSINESS_UNITS = ("DTS", "DDS", "DAR", "DWW", "DCN", "DES", "DRM")
+_BUSINESS_UNITS_SET = frozenset(BUSINESS_UNITS)  # O(1) checks on import
 
-PROJECT_MANAGER_OPTIONS = ["John Donald", "Lyndon Connolly", "Neil Jones"]
+PROJECT_MANAGER_OPTIONS = ("John Donald", "Lyndon Connolly", "Neil Jones")
 
-PROJECT_STATUS_OPTIONS = [
+PROJECT_STATUS_OPTIONS = (
     "Live Line", "Shut Down HV", "Shut Down LV", "De-energised",
     "Subcontractor only", "Tentative", "Unplanned", "Training",
     "9 Hr Break", "Leave", "Planning - Office based"
-]
+)
 
-SCHEDULE_STATUS = ["SCHEDULED", "CANCELLED", "COMPLETED"]
+SCHEDULE_STATUS = ("SCHEDULED", "CANCELLED", "COMPLETED")
 
-CUSTOMER_WORK_TYPE_OPTIONS = [
+CUSTOMER_WORK_TYPE_OPTIONS = (
     "VEC - CIW CSUB", "VEC - CIW SUBDV", "VEC - Asset replacment",
     "VEC - Capital Contestable", "VEC - Capital - Non Contestable",
     "VEC - Streetlights", "Non VECTOR Customer Works", "Leave",
     "Non Charge", "Training",
-]
+)
 
-RESOURCES_BOOKED_OPTIONS = [
+RESOURCES_BOOKED_OPTIONS = (
     "Callum Mc - LM", "Carlo D - TRLM", "Chris B - LM", "Ethan P - TRLM",
     "Howard C - FLM", "Jake A - LM", "Joel G - LM", "John C - TRLM",
     "Luke B - LM", "Mack I - GB LM", "Mike I - FLM", "Poutama LE - TRLM",
     "Sam G - FLM", "Steve R - SU", "Toby E - TRLM"
-]
+)
+_RESOURCES_SET = frozenset(RESOURCES_BOOKED_OPTIONS)
+
+# Validated import values map to the option-tuple string, so records share one str per label
+_LABELS = {
+    label: label
+    for options in (
+        BUSINESS_UNITS, PROJECT_MANAGER_OPTIONS, PROJECT_STATUS_OPTIONS,
+        SCHEDULE_STATUS, CUSTOMER_WORK_TYPE_OPTIONS, RESOURCES_BOOKED_OPTIONS,
+    )
+    for label in options
+}
+
+MISSING_FIELDS_MSG = "⚠️ Please fill in all required fields: "
+MAX_SCHEDULES = 5000  # per-session cap on in-memory schedules; oldest saved are evicted
+EVICTED_MSG = "⚠️ Oldest {n} schedule(s) were removed to stay within the in-memory limit; export regularly to keep a copy."
+HOURS_MIN, HOURS_MAX = 0.5, 24.0  # shared by the form input and import validation
+
+# -----------------------------------
+# Schedule record
+# -----------------------------------
+@dataclass(slots=True, frozen=True)
+class Schedule:
+    """One saved schedule; `to_json_dict` / `from_json_dict` keep the JSON wire format."""
+    schedule_id: str
+    schedule_date: str  # ISO "YYYY-MM-DD"
+    business_unit: str
+    work_order_number: str
+    customer_work_type: str
+    job_description: str
+    project_manager: str
+    task_information: str
+    project_status: str
+    resources_booked: Tuple[str, ...]
+    hours_per_resource: float
+    status: str
+    notes: str
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        d = {f.name: getattr(self, f.name) for f in fields(self)}
+        d["resources_booked"] = list(self.resources_booked)
+        return d
+
+    @classmethod
+    def from_json_dict(cls, sid: str, rec: Any) -> Schedule:
+        """Validate one imported record and build it; raises ValueError if malformed."""
+        if not isinstance(rec, dict):
+            raise ValueError("record is not an object")
+        if rec.get("schedule_id", sid) != sid:
+            raise ValueError("schedule_id does not match its key")
+        if not is_iso_date(rec.get("schedule_date")):
+            raise ValueError("schedule_date is not YYYY-MM-DD")
+        text = {name: rec.get(name, "") for name in _TEXT_FIELDS}
+        bad = [name for name, value in text.items() if not isinstance(value, str)]
+        if bad:
+            raise ValueError(f"{', '.join(bad)} must be text")
+        labels = {name: rec.get(name, default) for name, (_, default) in _LABEL_FIELDS.items()}
+        bad = [
+            name for name, value in labels.items()
+            if not isinstance(value, str) or value not in _LABEL_FIELDS[name][0]
+        ]
+        if bad:
+            raise ValueError(f"unknown {', '.join(bad)}")
+        booked = rec.get("resources_booked")
+        if booked is None:
+            booked = []
+        if not isinstance(booked, list) or not all(isinstance(r, str) for r in booked):
+            raise ValueError("resources_booked must be a list of names")
+        hrs = rec.get("hours_per_resource")
+        if hrs is not None and (isinstance(hrs, bool) or not isinstance(hrs, (int, float))):
+            raise ValueError("hours_per_resource must be a number")
+        # Same required-field rule as the save form
+        missing = missing_fields((
+            ("work_order_number", text["work_order_number"]),
+            ("job_description", text["job_description"]),
+            ("task_information", text["task_information"]),
+            ("resources_booked", booked),
+            ("hours_per_resource", hrs),
+        ))
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        unknown = [r for r in booked if r not in _RESOURCES_SET]
+        if unknown:
+            raise ValueError(f"unknown resource(s): {', '.join(unknown)}")
+        if not HOURS_MIN <= hrs <= HOURS_MAX:
+            raise ValueError(f"hours_per_resource must be from {HOURS_MIN} to {HOURS_MAX}")
+        if sid != schedule_id_for(text["work_order_number"], rec["schedule_date"]):
+            raise ValueError("key is not <work_order_number>-<YYYYMMDD>")
+        labels = {name: _LABELS[value] for name, value in labels.items()}
+        return cls(
+            schedule_id=sid,
+            schedule_date=rec["schedule_date"],
+            resources_booked=tuple(_LABELS[r] for r in booked),
+            hours_per_resource=float(hrs),
+            **text,
+            **labels,
+        )
+
+# Free-text fields checked on import; "" when absent
+_TEXT_FIELDS = ("work_order_number", "job_description", "task_information", "notes")
+# Dropdown-backed fields: allowed values and the default when absent (None = required)
+_LABEL_FIELDS = {
+    "business_unit": (_BUSINESS_UNITS_SET, None),
+    "customer_work_type": (frozenset(CUSTOMER_WORK_TYPE_OPTIONS), None),
+    "project_manager": (frozenset(PROJECT_MANAGER_OPTIONS), None),
+    "project_status": (frozenset(PROJECT_STATUS_OPTIONS), None),
+    "status": (frozenset(SCHEDULE_STATUS), "SCHEDULED"),
+}
 
 # -----------------------------------
 # Helpers
 # -----------------------------------
-def schedule_id_for(work_order: str, sched_date: date) -> str:
-    return f"{work_order}-{sched_date.strftime('%Y%m%d')}"
+def schedule_id_for(work_order: str, iso_date: str) -> str:
+    return f"{work_order}-{iso_date.replace('-', '')}"
+
+def missing_fields(checks: Tuple[Tuple[str, Any], ...]) -> Tuple[str, ...]:
+    """Labels whose value is empty: None, blank/whitespace text, or an empty selection."""
+    return tuple(
+        label for label, value in checks
+        if not value or (isinstance(value, str) and not value.strip())
+    )
 
-def month_days(year: int, month: int):
-    """Yield dates covering the month, padded to start Monday / end Sunday."""
+def month_days(year: int, month: int) -> Tuple[date, ...]:
+    """Dates covering the month, padded to start Monday / end Sunday."""
     first = date(year, month, 1)
     start = first - timedelta(days=first.weekday())  # Monday start
     _, last_day = monthrange(year, month)
     last = date(year, month, last_day)
     end = last + timedelta(days=(6 - last.weekday()))  # Sunday end
-    cur = start
-    while cur <= end:
-        yield cur
-        cur += timedelta(days=1)
+    return tuple(start + timedelta(days=i) for i in range((end - start).days + 1))
+
+def month_key(iso_d: str) -> int:
+    """`year*12 + month` for an ISO date string; the `by_month` key."""
+    return int(iso_d[:4]) * 12 + int(iso_d[5:7])
+
+def is_iso_date(value: Any) -> bool:
+    """True for a canonical "YYYY-MM-DD" string (the only form the index expects)."""
+    try:
+        return date.fromisoformat(value).isoformat() == value
+    except (TypeError, ValueError):
+        return False
+
+def unindex_schedule(sid: str, rec: Schedule) -> None:
+    """Drop `sid` from the `by_month` bucket of `rec`'s date."""
+    iso_d = rec.schedule_date
+    days = st.session_state.by_month.get(month_key(iso_d), {})
+    ids = days.get(iso_d, [])
+    if sid in ids:
+        ids.remove(sid)
+        if not ids:
+            del days[iso_d]
+
+def store_schedule(sid: str, rec: Schedule) -> int:
+    """Insert/overwrite a schedule and keep the `by_month` index in step.
+
+    The store is bounded: a (re)saved schedule becomes the newest entry and the
+    oldest ones are evicted past MAX_SCHEDULES. Returns how many were evicted.
+    Callers bump `schedules_version` once per save/import batch.
+    """
+    schedules = st.session_state.schedules
+    old = schedules.pop(sid, None)  # re-inserted below as the newest entry
+    if old is not None and old.schedule_date != rec.schedule_date:
+        unindex_schedule(sid, old)  # imported record moved to another day
+    schedules[sid] = rec
+    iso_d = rec.schedule_date
+    ids = st.session_state.by_month.setdefault(month_key(iso_d), {}).setdefault(iso_d, [])
+    if sid not in ids:  # re-saving the same WO/date overwrites in place
+        ids.append(sid)
+
+    evicted = 0
+    while len(schedules) > MAX_SCHEDULES:
+        oldest = next(iter(schedules))
+        unindex_schedule(oldest, schedules.pop(oldest))
+        evicted += 1
+    return evicted
+
+def schedules_for_iso(iso_d: str) -> List[Schedule]:
+    """All schedules on an ISO date, read via the month index (no full scan)."""
+    ids = st.session_state.by_month.get(month_key(iso_d), {}).get(iso_d, [])
+    return [st.session_state.schedules[sid] for sid in ids]
+
+def month_counts(year: int, month: int) -> Dict[str, int]:
+    """Per-day schedule counts for a month, proportional to that month's schedules."""
+    days = st.session_state.by_month.get(year * 12 + month, {})
+    return {iso_d: len(ids) for iso_d, ids in days.items()}
+
+def flatten_for_table(records: List[Schedule]) -> pd.DataFrame:
+    """One row per booked resource (a single "—" row if none), built column-wise."""
+    bu_col: List[str] = []
+    wo_col: List[str] = []
+    cwt_col: List[str] = []
+    pm_col: List[str] = []
+    stat_col: List[str] = []
+    res_col: List[str] = []
+    hrs_col: List[Any] = []
+    notes_col: List[str] = []
+    for rec in records:
+        booked = rec.resources_booked or ("—",)
+        n = len(booked)
+        bu_col += [rec.business_unit] * n
+        wo_col += [rec.work_order_number] * n
+        cwt_col += [rec.customer_work_type] * n
+        pm_col += [rec.project_manager] * n
+        stat_col += [rec.project_status] * n
+        res_col += booked
+        hrs_col += [rec.hours_per_resource] * n
+        notes_col += [rec.notes] * n
+    return pd.DataFrame({
+        "BU": bu_col,
+        "Work Order": wo_col,
+        "Customer / Work Type": cwt_col,
+        "PM": pm_col,
+        "Status": stat_col,
+        "Resource": res_col,
+        "Hrs/Res": hrs_col,
+        "Notes": notes_col,
+    })
+
+def day_table(version: int, iso_d: str) -> pd.DataFrame:
+    """`flatten_for_table` for one day, memoised until `version` changes.
+
+    Held in session state rather than `st.cache_data`: schedules are per
+    session, so the version counter alone would collide across sessions.
+    """
+    cache = st.session_state.day_table_cache
+    if cache["version"] != version:
+        cache["version"], cache["tables"] = version, {}
+    if iso_d not in cache["tables"]:
+        cache["tables"][iso_d] = flatten_for_table(schedules_for_iso(iso_d))
+    return cache["tables"][iso_d]
+
+def json_dumps(obj: Any) -> bytes:
+    """Indented JSON bytes via orjson, or stdlib json when it isn't installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode("utf-8")
+
+def json_loads(data: bytes) -> Any:
+    """Parse JSON bytes; raises ValueError on bad input with either backend."""
+    if orjson is not None:
+        return orjson.loads(data)
+    try:
+        return json.loads(data)
+    except RecursionError as exc:  # stdlib recurses on deeply nested input
+        raise ValueError("JSON is nested too deeply") from exc
+
+def schedules_frame() -> pd.DataFrame:
+    """All schedules as one columnar frame, one row per schedule (wire-format columns)."""
+    return pd.DataFrame(
+        [rec.to_json_dict() for rec in st.session_state.schedules.values()],
+        columns=[f.name for f in fields(Schedule)],
+    )
+
+def prepared_exports(version: int) -> Optional[Dict[str, bytes]]:
+    """Export files built for `version`, or None if they need (re)building."""
+    cache = st.session_state.export_cache
+    return cache["files"] if cache["version"] == version else None
+
+def prepare_exports(version: int) -> Dict[str, bytes]:
+    """Build the JSON and Parquet exports once, on request, and keep them for `version`.
+
+    Both are O(N) in schedules, so they are not rebuilt on every save/import.
+    """
+    buf = io.BytesIO()
+    schedules_frame().to_parquet(buf, compression="zstd", index=False)
+    files = {
+        "json": json_dumps({"schedules": {
+            sid: rec.to_json_dict() for sid, rec in st.session_state.schedules.items()
+        }}),
+        "parquet": buf.getvalue(),
+    }
+    st.session_state.export_cache = {"version": version, "files": files}
+    return files
+
+# -----------------------------------
+# Sidebar: JSON import / export
+# -----------------------------------
+with st.sidebar:
+    st.header("Data")
+    export_slot = st.container()  # filled at the end so it includes this run's save
+
+    up = st.file_uploader("Import schedules_poc.json", type=["json"])
+    # The uploader keeps its file across reruns; import each upload only once.
+    if up is not None and st.session_state.get("imported_file_id") != up.file_id:
+        st.session_state.imported_file_id = up.file_id
+        try:
+            data = json_loads(up.getvalue())
+        except ValueError as exc:
+            st.error(f"⚠️ Could not read JSON: {exc}")
+        else:
+            if isinstance(data, dict) and isinstance(data.get("schedules"), dict):
+                stored, evicted, rejected = [], 0, {}
+                for sid, rec in data["schedules"].items():
+                    try:
+                        evicted += store_schedule(sid, Schedule.from_json_dict(sid, rec))
+                    except ValueError as exc:
+                        rejected[sid] = str(exc)
+                    else:
+                        stored.append(sid)
+                st.session_state.schedules_version += 1
+                # A batch over the cap can evict its own earlier records; count survivors only
+                kept = sum(1 for sid in stored if sid in st.session_state.schedules)
+                st.success(f"✅ Imported {kept} schedule(s).")
+                if evicted:
+                    st.warning(EVICTED_MSG.format(n=evicted))
+                if rejected:
+                    first_sid, reason = next(iter(rejected.items()))
+                    st.warning(f"⚠️ Skipped {len(rejected)} invalid record(s), e.g. {first_sid}: {reason}")
+            else:
+                st.error('⚠️ Expected a JSON object with a "schedules" mapping.')
 
 # -----------------------------------
 # Tabs: Scheduler | Calendar
@@ -151,8 +458,8 @@ with tab_sched:
         with c3:
             hours_per_resource = st.number_input(
                 "Hours per resource (required)",
-                min_value=0.5,
-                max_value=24.0,
+                min_value=HOURS_MIN,
+                max_value=HOURS_MAX,
                 value=None,
                 step=0.5,
                 format="%.1f"
@@ -168,144 +475,137 @@ with tab_sched:
 
     # Validation + Save
     if left_submit:
-        missing = []
-        if not selected_bu: missing.append("Business Unit")
-        if not work_order_number.strip(): missing.append("Work Order Number")
-        if not customer_work_type: missing.append("Customer / Work Type")
-        if not job_description.strip(): missing.append("Job Description")
-        if not project_manager: missing.append("Project Manager")
-        if not task_information.strip(): missing.append("Task Information")
-        if not project_status: missing.append("Project Status")
-        if not resources_booked: missing.append("Resources Booked")
-        if hours_per_resource is None: missing.append("Hours per Resource")
+        missing = missing_fields((
+            ("Business Unit", selected_bu),
+            ("Work Order Number", work_order_number),
+            ("Customer / Work Type", customer_work_type),
+            ("Job Description", job_description),
+            ("Project Manager", project_manager),
+            ("Task Information", task_information),
+            ("Project Status", project_status),
+            ("Resources Booked", resources_booked),
+            ("Hours per Resource", hours_per_resource),
+        ))
 
         if missing:
-            st.error(f"⚠️ Please fill in all required fields: {', '.join(missing)}")
+            st.error(MISSING_FIELDS_MSG + ", ".join(missing))
         else:
-            sid = schedule_id_for(work_order_number, selected_date)
-            payload: Dict[str, Any] = {
-                "schedule_id": sid,
-                "schedule_date": selected_date.isoformat(),
-                "business_unit": selected_bu,
-                "work_order_number": work_order_number,
-                "customer_work_type": customer_work_type,
-                "job_description": job_description,
-                "project_manager": project_manager,
-                "task_information": task_information,
-                "project_status": project_status,
-                "resources_booked": resources_booked,  # list
-                "hours_per_resource": float(hours_per_resource),
-                "status": schedule_status,
-                "notes": notes,
-            }
-            st.session_state.schedules[sid] = payload
+            iso_date = selected_date.isoformat()
+            sid = schedule_id_for(work_order_number, iso_date)
+            payload = Schedule(
+                schedule_id=sid,
+                schedule_date=iso_date,
+                business_unit=selected_bu,
+                work_order_number=work_order_number,
+                customer_work_type=customer_work_type,
+                job_description=job_description,
+                project_manager=project_manager,
+                task_information=task_information,
+                project_status=project_status,
+                resources_booked=tuple(resources_booked),
+                hours_per_resource=float(hours_per_resource),
+                status=schedule_status,
+                notes=notes,
+            )
+            evicted = store_schedule(sid, payload)
+            st.session_state.schedules_version += 1
             st.success("✅ Schedule saved in memory (POC).")
+            if evicted:
+                st.warning(EVICTED_MSG.format(n=evicted))
 
 # ===================================
 # TAB: Calendar (Option A with placeholder detail)
 # ===================================
-with tab_cal:
+@st.fragment
+def render_calendar() -> None:
+    """Calendar grid + day detail; reruns on its own, leaving the Scheduler tab untouched."""
     st.subheader("Calendar overview")
 
     # Month selector (defaults to current month)
     sel_month = st.date_input("Month", value=date.today().replace(day=1), key="cal_month")
     yyyy, mm = sel_month.year, sel_month.month
 
-    # Build counts per day for the month
-    day_counts: Dict[str, int] = {}
-    for rec in st.session_state.schedules.values():
-        d = rec.get("schedule_date")
-        if not d:
-            continue
-        if d.startswith(f"{yyyy:04d}-{mm:02d}-"):
-            day_counts[d] = day_counts.get(d, 0) + 1
+    # Counts per day for the month (read from the month index)
+    day_counts = month_counts(yyyy, mm)
 
-    # Month label + weekday header
+    # One day picker instead of a "View" button per tile: a single widget, and
+    # only days that actually have schedules are offered.
+    selected_day = st.selectbox(
+        "View day",
+        sorted(day_counts),
+        index=None,
+        format_func=lambda iso_d: f"{iso_d} ({day_counts[iso_d]})",
+        placeholder="Select a day with schedules...",
+        key="calendar_selected_day",
+    )
+
+    # Month label, then weekday header + day tiles shipped as a single HTML block
     st.caption(f"{datetime(yyyy, mm, 1):%B %Y}")
-    hdr = st.columns(7)
-    for i, wd in enumerate(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
-        hdr[i].markdown(f"**{wd}**")
-
-    # Render month grid
-    selected_day = st.session_state.get("calendar_selected_day")
-    colset = None
-    for i, d in enumerate(month_days(yyyy, mm)):
-        if i % 7 == 0:
-            colset = st.columns(7)
-
-        iso_d = d.isoformat()
-        in_month = (d.month == mm)
-        count = day_counts.get(iso_d, 0)
-
-        with colset[i % 7]:
-            # Day tile
-            opacity = "0.45" if not in_month else "1.0"
-            st.markdown(
-                f"""
-                <div style="padding:8px;border-radius:8px;border:1px solid #444; opacity:{opacity}">
-                  <div style="display:flex;justify-content:space-between;align-items:center;">
-                    <span style="font-weight:600;">{d.day}</span>
-                    <span style="background:#F05A28;color:white;border-radius:12px;padding:0 8px;font-size:12px;">{count}</span>
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-            # Click to view details for this day
-            if st.button("View", key=f"view-{iso_d}"):
-                st.session_state.calendar_selected_day = iso_d
-                selected_day = iso_d
+    cells = [
+        f'<div style="font-weight:700;">{wd}</div>'
+        for wd in ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+    ]
+    for d in month_days(yyyy, mm):
+        opacity = "0.45" if d.month != mm else "1.0"
+        count = day_counts.get(d.isoformat(), 0)
+        cells.append(
+            f'<div style="padding:8px;border-radius:8px;border:1px solid #444;opacity:{opacity}">'
+            '<div style="display:flex;justify-content:space-between;align-items:center;">'
+            f'<span style="font-weight:600;">{d.day}</span>'
+            '<span style="background:#F05A28;color:white;border-radius:12px;'
+            f'padding:0 8px;font-size:12px;">{count}</span>'
+            "</div></div>"
+        )
+    st.html(
+        '<div style="display:grid;grid-template-columns:repeat(7,1fr);gap:6px;">'
+        + "".join(cells)
+        + "</div>"
+    )
 
     st.markdown("---")
-# Detail panel — show scheduled resources for the selected day
-if selected_day:
-    # Gather all schedules for the clicked date
-    day_list = [
-        rec for rec in st.session_state.schedules.values()
-        if rec.get("schedule_date") == selected_day
-    ]
 
-    st.subheader(f"Schedules for {selected_day} ({len(day_list)})")
+    # Detail panel — show scheduled resources for the selected day
+    if selected_day:
+        # Gather all schedules for the clicked date
+        day_list = schedules_for_iso(selected_day)
+
+        st.subheader(f"Schedules for {selected_day} ({len(day_list)})")
+
+        if not day_list:
+            st.info("No schedules for this day.")
+        else:
+            st.dataframe(
+                day_table(st.session_state.schedules_version, selected_day),
+                use_container_width=True,
+            )
+    else:
+        st.info("Select a day above to see details.")
 
-    if not day_list:
-        st.info("No schedules for this day.")
+with tab_cal:
+    render_calendar()
+
+# Export is rendered last so a schedule saved in this run is already included
+with export_slot:
+    version = st.session_state.schedules_version
+    files = prepared_exports(version)
+    prepare_slot = st.empty()
+    if files is None and prepare_slot.button("📦 Prepare export files", use_container_width=True):
+        files = prepare_exports(version)
+        prepare_slot.empty()
+    if files is None:
+        st.caption("Exports are built on request from the current schedules.")
     else:
-        rows = []
-        for rec in day_list:
-            bu   = rec.get("business_unit", "")
-            wo   = rec.get("work_order_number", "")
-            cwt  = rec.get("customer_work_type", "")
-            pm   = rec.get("project_manager", "")
-            stat = rec.get("project_status", "")
-            hrs  = rec.get("hours_per_resource", None)
-            notes = rec.get("notes", "")
-            booked = rec.get("resources_booked", []) or []
-
-            # One row per resource booked; fallback to a single row if none
-            if booked:
-                for person in booked:
-                    rows.append({
-                        "BU": bu,
-                        "Work Order": wo,
-                        "Customer / Work Type": cwt,
-                        "PM": pm,
-                        "Status": stat,
-                        "Resource": person,
-                        "Hrs/Res": hrs,
-                        "Notes": notes
-                    })
-            else:
-                rows.append({
-                    "BU": bu,
-                    "Work Order": wo,
-                    "Customer / Work Type": cwt,
-                    "PM": pm,
-                    "Status": stat,
-                    "Resource": "—",
-                    "Hrs/Res": hrs,
-                    "Notes": notes
-                })
-
-        st.dataframe(pd.DataFrame(rows), use_container_width=True)
-else:
-    st.info("Select a day in the grid to see details.")
+        st.download_button(
+            "⬇️ Export all schedules to JSON",
+            data=files["json"],
+            file_name="schedules_poc.json",
+            mime="application/json",
+            use_container_width=True,
+        )
+        st.download_button(
+            "⬇️ Parquet snapshot (zstd)",
+            data=files["parquet"],
+            file_name="schedules_poc.parquet",
+            mime="application/vnd.apache.parquet",
+            use_container_width=True,
+        )